@@ -0,0 +1,303 @@
+import contextvars
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Optional
+
+from sqlalchemy import event
+
+
+LATENCY_KINDS = {'fixed', 'uniform', 'exponential', 'lognormal'}
+
+
+@dataclass
+class LatencyDistribution:
+    """Injected delay in milliseconds.
+
+    ``fixed`` always waits ``ms``; ``uniform`` draws between ``ms`` and
+    ``max_ms``; ``exponential`` has mean ``ms``; ``lognormal`` has median
+    ``ms`` and shape ``sigma``, which gives a realistic long tail.
+    """
+
+    kind: str = 'fixed'
+    ms: float = 0.0
+    max_ms: float = 0.0
+    sigma: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.kind not in LATENCY_KINDS:
+            raise ValueError(
+                f'Unknown latency kind {self.kind!r}; expected one of {sorted(LATENCY_KINDS)}'
+            )
+        if self.ms < 0 or self.max_ms < 0:
+            raise ValueError('Latency values must not be negative.')
+        if self.kind == 'uniform' and self.max_ms < self.ms:
+            raise ValueError('Uniform latency needs max_ms >= ms.')
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'uniform':
+            value = rng.uniform(self.ms, self.max_ms)
+        elif self.kind == 'exponential':
+            value = rng.expovariate(1.0 / self.ms) if self.ms > 0 else 0.0
+        elif self.kind == 'lognormal':
+            value = rng.lognormvariate(math.log(self.ms), self.sigma) if self.ms > 0 else 0.0
+        else:
+            value = self.ms
+        return max(value, 0.0) / 1000
+
+
+@dataclass
+class RouteFaults:
+    latency_rate: float = 0.0
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    error_rate: float = 0.0
+    error_status: int = 500
+    slow_query_rate: float = 0.0
+    slow_query: LatencyDistribution = field(default_factory=LatencyDistribution)
+    # When set, a request gets either the delay or the error, never both.
+    exclusive: bool = False
+
+    def __post_init__(self) -> None:
+        for name in ('latency_rate', 'error_rate', 'slow_query_rate'):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f'{name} must be between 0 and 1.')
+        if self.exclusive and self.latency_rate + self.error_rate > 1.0:
+            raise ValueError('latency_rate + error_rate must not exceed 1 when exclusive.')
+
+
+@dataclass
+class ChaosProfile:
+    """Faults keyed by ``"METHOD /path"`` glob patterns; the first match wins."""
+
+    name: str
+    routes: dict[str, RouteFaults] = field(default_factory=dict)
+
+    def match(self, method: str, path: str) -> Optional[tuple[str, RouteFaults]]:
+        """Return the first matching ``(pattern, faults)`` pair, if any."""
+        target = f'{method} {path}'
+        for pattern, faults in self.routes.items():
+            if fnmatchcase(target, pattern):
+                return pattern, faults
+        return None
+
+
+BUILTIN_PROFILES = {
+    'off': ChaosProfile(name='off'),
+    # Matches the original CHAOS_MODE behaviour: one 10% roll that then picks
+    # either a fixed 3 s delay or a 500, i.e. 5% of each and never both.
+    'legacy': ChaosProfile(
+        name='legacy',
+        routes={
+            '* *': RouteFaults(
+                latency_rate=0.05,
+                latency=LatencyDistribution(kind='fixed', ms=3000),
+                error_rate=0.05,
+                exclusive=True,
+            ),
+        },
+    ),
+    'slow-reads': ChaosProfile(
+        name='slow-reads',
+        routes={
+            'GET /rooms*': RouteFaults(
+                latency_rate=0.5,
+                latency=LatencyDistribution(kind='lognormal', ms=200, sigma=1.0),
+            ),
+            'GET /my-bookings': RouteFaults(
+                latency_rate=0.5,
+                latency=LatencyDistribution(kind='lognormal', ms=200, sigma=1.0),
+            ),
+        },
+    ),
+    'flaky-bookings': ChaosProfile(
+        name='flaky-bookings',
+        routes={
+            'POST /bookings': RouteFaults(error_rate=0.1, error_status=503),
+            'DELETE /bookings/*': RouteFaults(error_rate=0.1, error_status=503),
+        },
+    ),
+    'slow-db': ChaosProfile(
+        name='slow-db',
+        routes={
+            '* *': RouteFaults(
+                slow_query_rate=0.2,
+                slow_query=LatencyDistribution(kind='exponential', ms=250),
+            ),
+        },
+    ),
+}
+
+
+def _distribution_from_dict(data: Optional[dict]) -> LatencyDistribution:
+    return LatencyDistribution(**(data or {}))
+
+
+def _profile_from_dict(name: str, data: dict) -> ChaosProfile:
+    routes = {}
+    for pattern, faults in data.get('routes', {}).items():
+        faults = dict(faults)
+        faults['latency'] = _distribution_from_dict(faults.get('latency'))
+        faults['slow_query'] = _distribution_from_dict(faults.get('slow_query'))
+        routes[pattern] = RouteFaults(**faults)
+    return ChaosProfile(name=name, routes=routes)
+
+
+def load_profiles(path: Optional[str] = None) -> dict[str, ChaosProfile]:
+    """Return the built-in profiles plus any defined in the JSON file at ``path``."""
+    profiles = dict(BUILTIN_PROFILES)
+    if path:
+        with open(path, encoding='utf-8') as handle:
+            for name, data in json.load(handle).items():
+                try:
+                    profiles[name] = _profile_from_dict(name, data)
+                except (TypeError, ValueError) as exc:
+                    raise ValueError(f'Invalid chaos profile {name!r}: {exc}') from exc
+    return profiles
+
+
+_current_faults: contextvars.ContextVar[
+    Optional[tuple[str, RouteFaults, random.Random]]
+] = contextvars.ContextVar('chaos_current_faults', default=None)
+
+
+class ChaosController:
+    def __init__(
+        self,
+        profiles: dict[str, ChaosProfile],
+        active: str = 'off',
+        seed: Optional[int] = None,
+        token: str = '',
+    ):
+        if active not in profiles:
+            raise RuntimeError(f'Unknown chaos profile: {active}')
+        self.profiles = profiles
+        self.active = active
+        self.seed = seed
+        self.token = token
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+        self._route_requests: Counter = Counter()
+
+    def check_token(self, token: Optional[str]) -> bool:
+        return bool(self.token) and hmac.compare_digest(
+            (token or '').encode(), self.token.encode()
+        )
+
+    def resolve_profile(self, requested: Optional[str], token: Optional[str]) -> ChaosProfile:
+        # Per-request overrides are only honoured with the configured secret.
+        if requested in self.profiles and self.check_token(token):
+            return self.profiles[requested]
+        return self.profiles[self.active]
+
+    def _request_rng(self, profile_name: str, pattern: str) -> random.Random:
+        """Give each request its own RNG derived from the seed.
+
+        The n-th request matching a route pattern always draws the same
+        faults, however requests interleave across threads. sha256 is used
+        because hash() of a str is salted per process.
+        """
+        if self.seed is None:
+            return random.Random()
+        with self._lock:
+            index = self._route_requests[(profile_name, pattern)]
+            self._route_requests[(profile_name, pattern)] += 1
+        key = f'{self.seed}:{profile_name}:{pattern}:{index}'.encode()
+        return random.Random(int.from_bytes(hashlib.sha256(key).digest()[:8], 'big'))
+
+    def _record(self, profile: str, kind: str) -> None:
+        with self._lock:
+            self._counters[(profile, kind)] += 1
+
+    def begin_request(
+        self, profile: ChaosProfile, method: str, path: str
+    ) -> tuple[float, Optional[int]]:
+        """Pick this request's faults; returns (delay in seconds, error status)."""
+        matched = profile.match(method, path)
+        if matched is None:
+            _current_faults.set(None)
+            return 0.0, None
+        pattern, faults = matched
+        rng = self._request_rng(profile.name, pattern)
+        _current_faults.set((profile.name, faults, rng))
+
+        roll = rng.random()
+        if faults.exclusive:
+            # One roll picks at most one fault: [0, latency_rate) delays, the
+            # next error_rate of the range errors.
+            if roll < faults.latency_rate:
+                self._record(profile.name, 'latency')
+                return faults.latency.sample(rng), None
+            if roll < faults.latency_rate + faults.error_rate:
+                self._record(profile.name, f'error_{faults.error_status}')
+                return 0.0, faults.error_status
+            return 0.0, None
+
+        delay = 0.0
+        if roll < faults.latency_rate:
+            delay = faults.latency.sample(rng)
+            self._record(profile.name, 'latency')
+        if rng.random() < faults.error_rate:
+            self._record(profile.name, f'error_{faults.error_status}')
+            return delay, faults.error_status
+        return delay, None
+
+    def slow_query_delay(self) -> float:
+        current = _current_faults.get()
+        if current is None:
+            return 0.0
+        profile_name, faults, rng = current
+        if rng.random() >= faults.slow_query_rate:
+            return 0.0
+        self._record(profile_name, 'slow_query')
+        return faults.slow_query.sample(rng)
+
+    def install_db_hooks(self, *engines) -> None:
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            delay = self.slow_query_delay()
+            if delay:
+                time.sleep(delay)
+
+        for engine in set(engines):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = [
+                {'profile': profile, 'fault': kind, 'count': count}
+                for (profile, kind), count in sorted(self._counters.items())
+            ]
+        return {
+            'active_profile': self.active,
+            'injected': counters,
+        }
+
+
+def _default_profile_name() -> str:
+    name = os.getenv('CHAOS_PROFILE')
+    if name:
+        return name
+    # Keep the old switch working.
+    if os.getenv('CHAOS_MODE', 'False').lower() == 'true':
+        return 'legacy'
+    return 'off'
+
+
+def _seed_from_env() -> Optional[int]:
+    seed = os.getenv('CHAOS_SEED')
+    return int(seed) if seed else None
+
+
+chaos = ChaosController(
+    load_profiles(os.getenv('CHAOS_PROFILES_FILE')),
+    active=_default_profile_name(),
+    seed=_seed_from_env(),
+    token=os.getenv('CHAOS_TOKEN', ''),
+)
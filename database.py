@@ -10,6 +10,16 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_PIN_SECONDS = float(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "5"))
+
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Without a replica configured, reads simply share the primary engine.
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(DATABASE_REPLICA_URL, pool_pre_ping=True)
+else:
+    replica_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
@@ -1,7 +1,10 @@
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import axios from 'axios'
 import { api } from '../lib/api'
-import type { Room } from '../types'
+import type { Room, SlotHold } from '../types'
+
+const HOLD_DEBOUNCE_MS = 600
+const HOLD_RENEW_MARGIN_MS = 15_000
 
 type BookingModalProps = {
   room: Room
@@ -14,6 +17,9 @@ const BookingModal = ({ room, onClose, onBooked }: BookingModalProps) => {
   const [endTime, setEndTime] = useState('')
   const [attendeesCount, setAttendeesCount] = useState('1')
   const [submitting, setSubmitting] = useState(false)
+  const [holdWarning, setHoldWarning] = useState('')
+  const holdIdRef = useRef<number | null>(null)
+  const unmountedRef = useRef(false)
 
   const durationHours =
     startTime && endTime
@@ -55,6 +61,66 @@ const BookingModal = ({ room, onClose, onBooked }: BookingModalProps) => {
     return 'Booking failed. Please try again.'
   }
 
+  // Hold the selected slot while the modal is open so other users see it as taken.
+  // The server replaces our previous hold on this room, so edits only need a
+  // new (debounced) request, and the hold is renewed shortly before it expires.
+  useEffect(() => {
+    if (!startTime || !endTime || durationHours <= 0) return
+    let active = true
+    let timer: number | undefined
+
+    const placeHold = async () => {
+      try {
+        const response = await api.post<SlotHold>('/holds', {
+          room_id: room.id,
+          start_time: startTime,
+          end_time: endTime,
+        })
+        if (!active) {
+          if (unmountedRef.current) {
+            api.delete(`/holds/${response.data.id}`).catch(() => undefined)
+          }
+          return
+        }
+        holdIdRef.current = response.data.id
+        setHoldWarning('')
+        const renewIn = Math.max(
+          new Date(response.data.expires_at).getTime() -
+            Date.now() -
+            HOLD_RENEW_MARGIN_MS,
+          HOLD_RENEW_MARGIN_MS,
+        )
+        timer = window.setTimeout(placeHold, renewIn)
+      } catch (error) {
+        if (!active) return
+        const statusCode = axios.isAxiosError(error) ? error.response?.status : undefined
+        setHoldWarning(
+          statusCode === 409
+            ? 'This time is being held or booked by someone else.'
+            : statusCode === 429
+              ? 'You are holding too many rooms at once.'
+              : '',
+        )
+      }
+    }
+
+    timer = window.setTimeout(placeHold, HOLD_DEBOUNCE_MS)
+    return () => {
+      active = false
+      window.clearTimeout(timer)
+    }
+  }, [room.id, startTime, endTime, durationHours])
+
+  useEffect(() => {
+    unmountedRef.current = false
+    return () => {
+      unmountedRef.current = true
+      if (holdIdRef.current !== null) {
+        api.delete(`/holds/${holdIdRef.current}`).catch(() => undefined)
+      }
+    }
+  }, [])
+
   const handleConfirm = async () => {
     if (!startTime || !endTime) {
       alert('Please select both start and end times.')
@@ -73,6 +139,8 @@ const BookingModal = ({ room, onClose, onBooked }: BookingModalProps) => {
         end_time: endTime,
         attendees_count: parsedAttendees,
       })
+      // The booking consumed our hold on the server.
+      holdIdRef.current = null
       onClose()
       alert('Booking Successful!')
       onBooked()
@@ -138,6 +206,11 @@ const BookingModal = ({ room, onClose, onBooked }: BookingModalProps) => {
               {durationLabel}
             </span>
           </div>
+          {holdWarning && (
+            <span className="text-xs text-amber-700 dark:text-amber-300">
+              {holdWarning}
+            </span>
+          )}
           <label className="grid gap-2 text-sm font-medium text-slate-600 dark:text-slate-300">
             Number of Attendees
             <input
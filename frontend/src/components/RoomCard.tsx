@@ -10,6 +10,13 @@ type RoomCardProps = {
 type AvailabilityRange = {
   start: string
   end: string
+  status?: 'booked' | 'held'
+}
+
+type TimelineSegment = {
+  left: number
+  width: number
+  held: boolean
 }
 
 const TIMELINE_START = 8 * 60
@@ -69,9 +76,9 @@ const RoomCard = ({ room, onBook }: RoomCardProps) => {
         if (clampedEnd <= clampedStart) return null
         const left = ((clampedStart - TIMELINE_START) / TIMELINE_TOTAL) * 100
         const width = ((clampedEnd - clampedStart) / TIMELINE_TOTAL) * 100
-        return { left, width }
+        return { left, width, held: range.status === 'held' }
       })
-      .filter((segment): segment is { left: number; width: number } => !!segment)
+      .filter((segment): segment is TimelineSegment => !!segment)
   }, [availability])
 
   const toneClass =
@@ -112,7 +119,11 @@ const RoomCard = ({ room, onBook }: RoomCardProps) => {
           {segments.map((segment, index) => (
             <span
               key={`${room.id}-segment-${index}`}
-              className="absolute top-0 h-2 rounded-full bg-rose-500/80 dark:bg-rose-400/90"
+              className={`absolute top-0 h-2 rounded-full ${
+                segment.held
+                  ? 'bg-amber-400/80 dark:bg-amber-300/90'
+                  : 'bg-rose-500/80 dark:bg-rose-400/90'
+              }`}
               style={{ left: `${segment.left}%`, width: `${segment.width}%` }}
             />
           ))}
@@ -6,11 +6,26 @@ export const api = axios.create({
   baseURL,
 })
 
+// Signed, short-lived token returned after writes; sending it back keeps our
+// reads on the primary database until the replica has caught up.
+let primaryPin: string | null = null
+
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('auth-token')
+  config.headers = config.headers ?? {}
   if (token) {
-    config.headers = config.headers ?? {}
     config.headers.Authorization = `Bearer ${token}`
   }
+  if (primaryPin) {
+    config.headers['x-primary-pin'] = primaryPin
+  }
   return config
 })
+
+api.interceptors.response.use((response) => {
+  const pin = response.headers['x-primary-pin']
+  if (typeof pin === 'string' && pin) {
+    primaryPin = pin
+  }
+  return response
+})
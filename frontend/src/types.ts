@@ -20,3 +20,11 @@ export interface Booking {
   status: string
   created_at?: string | null
 }
+
+export interface SlotHold {
+  id: number
+  room_id: number
+  start_time: string
+  end_time: string
+  expires_at: string
+}
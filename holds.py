@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from models import now_thai_time
+
+SLOT_HOLD_TTL_SECONDS = int(os.getenv('SLOT_HOLD_TTL_SECONDS', '120'))
+MAX_HOLDS_PER_USER = int(os.getenv('MAX_HOLDS_PER_USER', '2'))
+
+
+class HoldConflictError(Exception):
+    pass
+
+
+class HoldLimitError(Exception):
+    pass
+
+
+@dataclass
+class SlotHold:
+    id: int
+    room_id: int
+    user_id: int
+    start_time: datetime
+    end_time: datetime
+    expires_at: datetime
+    deadline: float
+
+    def overlaps(self, start_time: datetime, end_time: datetime) -> bool:
+        return self.start_time < end_time and self.end_time > start_time
+
+
+class InMemoryHoldStore:
+    """Short-lived slot reservations kept in process memory.
+
+    Expired holds are evicted from a min-heap keyed on their deadline, so each
+    access only pops what has actually expired. Another backend (e.g. Redis)
+    can replace this by providing the same public methods.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = SLOT_HOLD_TTL_SECONDS,
+        max_holds_per_user: int = MAX_HOLDS_PER_USER,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_holds_per_user = max_holds_per_user
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._holds: dict[int, SlotHold] = {}
+        self._by_room: dict[int, dict[int, SlotHold]] = {}
+        self._by_user: dict[int, set[int]] = {}
+        self._expiry_heap: list[tuple[float, int]] = []
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry_heap)
+            self._remove(hold_id)
+
+    def _remove(self, hold_id: int) -> Optional[SlotHold]:
+        hold = self._holds.pop(hold_id, None)
+        if hold is None:
+            return None
+        room_holds = self._by_room.get(hold.room_id)
+        if room_holds is not None:
+            room_holds.pop(hold_id, None)
+            if not room_holds:
+                del self._by_room[hold.room_id]
+        user_holds = self._by_user.get(hold.user_id)
+        if user_holds is not None:
+            user_holds.discard(hold_id)
+            if not user_holds:
+                del self._by_user[hold.user_id]
+        return hold
+
+    def _conflicts(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_user_id: Optional[int],
+    ) -> list[SlotHold]:
+        return [
+            hold
+            for hold in self._by_room.get(room_id, {}).values()
+            if hold.user_id != exclude_user_id and hold.overlaps(start_time, end_time)
+        ]
+
+    def place(
+        self, room_id: int, user_id: int, start_time: datetime, end_time: datetime
+    ) -> SlotHold:
+        """Hold a slot for ``user_id``.
+
+        A user keeps at most one hold per room, so a new hold replaces (and
+        renews) theirs. Raises HoldConflictError if another user holds the
+        slot and HoldLimitError if the user already holds too many rooms.
+        """
+        with self._lock:
+            self._evict_expired()
+            if self._conflicts(room_id, start_time, end_time, exclude_user_id=user_id):
+                raise HoldConflictError()
+            replaced = [
+                hold
+                for hold in self._by_room.get(room_id, {}).values()
+                if hold.user_id == user_id
+            ]
+            active = len(self._by_user.get(user_id, ())) - len(replaced)
+            if active >= self.max_holds_per_user:
+                raise HoldLimitError()
+            for hold in replaced:
+                self._remove(hold.id)
+
+            deadline = time.monotonic() + self.ttl_seconds
+            hold = SlotHold(
+                id=next(self._ids),
+                room_id=room_id,
+                user_id=user_id,
+                start_time=start_time,
+                end_time=end_time,
+                expires_at=now_thai_time() + timedelta(seconds=self.ttl_seconds),
+                deadline=deadline,
+            )
+            self._holds[hold.id] = hold
+            self._by_room.setdefault(room_id, {})[hold.id] = hold
+            self._by_user.setdefault(user_id, set()).add(hold.id)
+            heapq.heappush(self._expiry_heap, (deadline, hold.id))
+            return hold
+
+    def get(self, hold_id: int) -> Optional[SlotHold]:
+        with self._lock:
+            self._evict_expired()
+            return self._holds.get(hold_id)
+
+    def release(self, hold_id: int) -> Optional[SlotHold]:
+        with self._lock:
+            return self._remove(hold_id)
+
+    def release_for_user(self, room_id: int, user_id: int) -> None:
+        with self._lock:
+            for hold in list(self._by_room.get(room_id, {}).values()):
+                if hold.user_id == user_id:
+                    self._remove(hold.id)
+
+    def conflicting(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_user_id: Optional[int] = None,
+    ) -> list[SlotHold]:
+        with self._lock:
+            self._evict_expired()
+            return self._conflicts(room_id, start_time, end_time, exclude_user_id)
+
+
+hold_store = InMemoryHoldStore()
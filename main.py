@@ -1,19 +1,29 @@
 ﻿import asyncio
+import csv
+import io
+import json
 import os
-import random
 from datetime import date, datetime, time, timedelta
 from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Query, Response, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session, joinedload
 
-from database import SessionLocal, engine
+from chaos import chaos
+from database import (
+    REPLICA_PIN_SECONDS,
+    ReadSessionLocal,
+    SessionLocal,
+    engine,
+    replica_engine,
+)
+from holds import HoldConflictError, HoldLimitError, hold_store
 import models
 import schemas
 
@@ -30,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["x-primary-pin"],
 )
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'change_me')
@@ -40,21 +51,25 @@ pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
 
-def _is_chaos_enabled() -> bool:
-    return os.getenv('CHAOS_MODE', 'False').lower() == 'true'
+chaos.install_db_hooks(engine, replica_engine)
 
 
 @app.middleware('http')
 async def chaos_engineering_middleware(request, call_next):
-    header_enabled = request.headers.get('x-chaos-token', '').lower() == 'true'
-    if (header_enabled or _is_chaos_enabled()) and random.random() < 0.1:
-        if random.choice([True, False]):
-            await asyncio.sleep(3)
-        else:
-            return JSONResponse(
-                status_code=500,
-                content={'detail': 'Chaos mode injected error.'},
-            )
+    if request.url.path == '/chaos/metrics':
+        return await call_next(request)
+    profile = chaos.resolve_profile(
+        request.headers.get('x-chaos-profile'),
+        request.headers.get('x-chaos-token'),
+    )
+    delay, error_status = chaos.begin_request(profile, request.method, request.url.path)
+    if delay:
+        await asyncio.sleep(delay)
+    if error_status is not None:
+        return JSONResponse(
+            status_code=error_status,
+            content={'detail': f'Chaos profile "{profile.name}" injected error.'},
+        )
     return await call_next(request)
 
 
@@ -66,6 +81,19 @@ def get_db():
         db.close()
 
 
+def get_read_db(primary_pin: Optional[str] = Header(default=None, alias='x-primary-pin')):
+    # Clients that just wrote send back their signed pin and are served from the
+    # primary until the replica catches up.
+    if primary_pin and _is_valid_primary_pin(primary_pin):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def _model_to_dict(model):
     if hasattr(model, 'model_dump'):
         return model.model_dump(exclude_unset=True)
@@ -95,6 +123,16 @@ def _validate_booking_times(start_time: datetime, end_time: datetime) -> None:
         )
 
 
+def _validate_opening_hours(start_time: datetime, end_time: datetime) -> None:
+    start_clock = start_time.timetz().replace(tzinfo=None)
+    end_clock = end_time.timetz().replace(tzinfo=None)
+    if start_clock < time(8, 0) or end_clock > time(20, 0):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Bookings are only allowed between 08:00 and 20:00.',
+        )
+
+
 def _validate_booking_duration(start_time: datetime, end_time: datetime) -> None:
     if end_time - start_time > timedelta(hours=4):
         raise HTTPException(
@@ -158,22 +196,48 @@ def _ensure_no_overlap(
         )
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
+def _decode_user_id(token: str) -> Optional[int]:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Primary pins share the signing key but must never authenticate.
+        if 'pin' in payload:
+            return None
+        user_id = payload.get('sub')
+        if user_id is None:
+            return None
+        return int(user_id)
+    except (JWTError, ValueError):
+        return None
+
+
+def _issue_primary_pin(response: Response) -> None:
+    if replica_engine is engine:
+        return
+    expire = datetime.utcnow() + timedelta(seconds=REPLICA_PIN_SECONDS)
+    response.headers['x-primary-pin'] = jwt.encode(
+        {'pin': True, 'exp': expire},
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+
+def _is_valid_primary_pin(pin: str) -> bool:
+    try:
+        payload = jwt.decode(pin, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get('pin') is True
+
+
+def _load_user_from_token(db: Session, token: str) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Could not validate credentials.',
         headers={'WWW-Authenticate': 'Bearer'},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get('sub')
-        if user_id is None:
-            raise credentials_exception
-        user_id = int(user_id)
-    except (JWTError, ValueError) as exc:
-        raise credentials_exception from exc
+    user_id = _decode_user_id(token)
+    if user_id is None:
+        raise credentials_exception
 
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user is None:
@@ -181,14 +245,124 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    return _load_user_from_token(db, token)
+
+
+def get_current_read_user(
+    db: Session = Depends(get_read_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    return _load_user_from_token(db, token)
+
+
+def get_current_admin(
+    current_user: models.User = Depends(get_current_user),
+) -> models.User:
+    if current_user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Admin privileges required.',
+        )
+    return current_user
+
+
+EXPORT_FIELDS = (
+    'id',
+    'room_id',
+    'room_name',
+    'user_id',
+    'start_time',
+    'end_time',
+    'attendees_count',
+    'status',
+    'created_at',
+)
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_rows(
+    start_date: Optional[date],
+    end_date: Optional[date],
+    room_id: Optional[int],
+    booking_status: Optional[str],
+):
+    # The session lives inside the generator: request dependencies are torn
+    # down before a StreamingResponse body is sent.
+    with ReadSessionLocal() as db:
+        query = (
+            db.query(
+                models.Booking.id,
+                models.Booking.room_id,
+                models.Room.name,
+                models.Booking.user_id,
+                models.Booking.start_time,
+                models.Booking.end_time,
+                models.Booking.attendees_count,
+                models.Booking.status,
+                models.Booking.created_at,
+            )
+            .join(models.Room, models.Booking.room_id == models.Room.id)
+        )
+        if start_date is not None:
+            day_start = datetime.combine(start_date, time.min).replace(tzinfo=models.THAI_TZ)
+            query = query.filter(models.Booking.start_time >= day_start)
+        if end_date is not None:
+            next_day = datetime.combine(end_date + timedelta(days=1), time.min).replace(
+                tzinfo=models.THAI_TZ
+            )
+            query = query.filter(models.Booking.start_time < next_day)
+        if room_id is not None:
+            query = query.filter(models.Booking.room_id == room_id)
+        if booking_status is not None:
+            query = query.filter(models.Booking.status == booking_status)
+
+        query = query.order_by(models.Booking.id).yield_per(EXPORT_BATCH_SIZE)
+        for row in query:
+            record = dict(zip(EXPORT_FIELDS, row))
+            for key in ('start_time', 'end_time', 'created_at'):
+                if record[key] is not None:
+                    record[key] = models.as_thai_time(record[key]).isoformat()
+            yield record
+
+
+def _stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def _stream_ndjson(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row, ensure_ascii=False))
+        if len(chunk) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
 def _ensure_default_user(db: Session) -> None:
-    existing = db.query(models.User).filter(models.User.email == 'admin@test.com').first()
+    existing = (
+        db.query(models.User)
+        .filter(models.User.email == models.DEFAULT_USER_EMAIL)
+        .first()
+    )
     if existing:
         return
     db.add(
         models.User(
             name='Admin User',
-            email='admin@test.com',
+            email=models.DEFAULT_USER_EMAIL,
             hashed_password=_get_password_hash('password123'),
             role='member',
             credit_limit=0,
@@ -197,11 +371,29 @@ def _ensure_default_user(db: Session) -> None:
     db.commit()
 
 
+def _ensure_admin_roles(db: Session) -> None:
+    if not models.ADMIN_EMAILS:
+        return
+    (
+        db.query(models.User)
+        .filter(
+            models.User.email.in_(models.ADMIN_EMAILS),
+            models.User.email != models.DEFAULT_USER_EMAIL,
+            models.User.role != 'admin',
+        )
+        .update({models.User.role: 'admin'}, synchronize_session=False)
+    )
+    db.commit()
+
+
 @app.on_event('startup')
 def startup() -> None:
     models.Base.metadata.create_all(bind=engine)
+    if replica_engine is not engine:
+        models.Base.metadata.create_all(bind=replica_engine)
     with SessionLocal() as db:
         _ensure_default_user(db)
+        _ensure_admin_roles(db)
 
 
 @app.get('/')
@@ -209,8 +401,22 @@ def root():
     return {'status': 'ok'}
 
 
+@app.get('/chaos/metrics')
+def chaos_metrics(chaos_token: Optional[str] = Header(default=None, alias='x-chaos-token')):
+    if not chaos.check_token(chaos_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='A valid x-chaos-token is required.',
+        )
+    return chaos.metrics()
+
+
 @app.post('/register', response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+def register(
+    user_in: schemas.UserCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+):
     existing = db.query(models.User).filter(models.User.email == user_in.email).first()
     if existing:
         raise HTTPException(
@@ -227,6 +433,7 @@ def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     db.add(user)
     db.commit()
     db.refresh(user)
+    _issue_primary_pin(response)
     return user
 
 
@@ -253,7 +460,7 @@ def login(
 @app.get('/rooms', response_model=list[schemas.RoomResponse])
 def list_rooms(
     room_type: models.RoomType | None = Query(default=None, alias='type'),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(models.Room)
     if room_type is not None:
@@ -265,7 +472,7 @@ def list_rooms(
 def room_availability(
     room_id: int,
     date: date = Query(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     room = db.query(models.Room).filter(models.Room.id == room_id).first()
     if not room:
@@ -288,25 +495,94 @@ def room_availability(
         .all()
     )
 
+    slots = [
+        (booking.start_time, booking.end_time, 'booked') for booking in bookings
+    ]
+    slots.extend(
+        (hold.start_time, hold.end_time, 'held')
+        for hold in hold_store.conflicting(room_id, day_start, day_end)
+    )
+
     ranges = []
-    for booking in bookings:
-        start_time = models.as_thai_time(booking.start_time)
-        end_time = models.as_thai_time(booking.end_time)
+    for slot_start, slot_end, slot_status in sorted(
+        slots, key=lambda slot: models.as_thai_time(slot[0])
+    ):
+        start_time = models.as_thai_time(slot_start)
+        end_time = models.as_thai_time(slot_end)
         start_time = max(start_time, day_start)
         end_time = min(end_time, day_end)
         ranges.append(
             {
                 'start': start_time.strftime('%H:%M'),
                 'end': end_time.strftime('%H:%M'),
+                'status': slot_status,
             }
         )
 
     return ranges
 
 
+@app.post('/holds', response_model=schemas.HoldResponse, status_code=status.HTTP_201_CREATED)
+def create_hold(
+    hold_in: schemas.HoldCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    start_time = models.as_thai_time(hold_in.start_time)
+    end_time = models.as_thai_time(hold_in.end_time)
+    _validate_booking_times(start_time, end_time)
+    _validate_booking_duration(start_time, end_time)
+    _validate_opening_hours(start_time, end_time)
+    if start_time < models.now_thai_time():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Cannot hold a slot in the past.',
+        )
+
+    room = db.query(models.Room).filter(models.Room.id == hold_in.room_id).first()
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Room not found.'
+        )
+    _ensure_no_overlap(db, room.id, start_time, end_time)
+
+    try:
+        return hold_store.place(room.id, current_user.id, start_time, end_time)
+    except HoldConflictError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Room is being held by another user for the requested time.',
+        ) from exc
+    except HoldLimitError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Too many rooms held at once. Release a hold first.',
+        ) from exc
+
+
+@app.delete('/holds/{hold_id}', status_code=status.HTTP_204_NO_CONTENT)
+def delete_hold(
+    hold_id: int,
+    current_user: models.User = Depends(get_current_user),
+):
+    hold = hold_store.get(hold_id)
+    if not hold:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Hold not found.'
+        )
+    if hold.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Not authorized to release this hold.',
+        )
+    hold_store.release(hold_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @app.post('/bookings', response_model=schemas.BookingResponse, status_code=status.HTTP_201_CREATED)
 def create_booking(
     booking_in: schemas.BookingCreate,
+    http_response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -314,15 +590,7 @@ def create_booking(
         # 1. Validate: Time Logic
         start_time = models.as_thai_time(booking_in.start_time)
         end_time = models.as_thai_time(booking_in.end_time)
-        start_clock = start_time.timetz().replace(tzinfo=None)
-        end_clock = end_time.timetz().replace(tzinfo=None)
-        opening_time = time(8, 0)
-        closing_time = time(20, 0)
-        if start_clock < opening_time or end_clock > closing_time:
-            raise HTTPException(
-                status_code=400,
-                detail="Bookings are only allowed between 08:00 and 20:00.",
-            )
+        _validate_opening_hours(start_time, end_time)
         if start_time >= end_time:
             raise HTTPException(status_code=400, detail="Start time must be before end time")
         
@@ -348,15 +616,12 @@ def create_booking(
             raise HTTPException(status_code=400, detail="Room Type C allows 6-10 people")
 
         # 3. Check Overlap (Simple Check without Lock to prevent 500 Error)
-        overlap = db.query(models.Booking).filter(
-            models.Booking.room_id == booking_in.room_id,
-            models.Booking.status == "active",
-            models.Booking.end_time > start_time,
-            models.Booking.start_time < end_time
-        ).first()
+        _ensure_no_overlap(db, booking_in.room_id, start_time, end_time)
 
-        if overlap:
-            raise HTTPException(status_code=409, detail="Room is already booked for this time")
+        if hold_store.conflicting(
+            booking_in.room_id, start_time, end_time, exclude_user_id=current_user.id
+        ):
+            raise HTTPException(status_code=409, detail="Room is being held by another user for this time")
 
         # 4. Create Booking
         booking = models.Booking(
@@ -372,6 +637,8 @@ def create_booking(
         db.add(booking)
         db.commit()             # <--- Commit ทีเดียวจบ
         db.refresh(booking)     # <--- ดึงข้อมูลล่าสุด (ID, created_at) กลับมา
+        _issue_primary_pin(http_response)
+        hold_store.release_for_user(booking_in.room_id, current_user.id)
         
         # 5. Prepare Response
         # ใส่ room_name กลับไปให้ Frontend (ถ้า Schema รองรับ)
@@ -392,8 +659,8 @@ def create_booking(
 
 @app.get('/my-bookings', response_model=list[schemas.BookingResponse])
 def list_my_bookings(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_read_user),
 ):
     # ดึงข้อมูลการจองของ "ฉัน" (คนที่ถือ Token) โดยไม่ต้องส่ง user_id มา
     bookings = (
@@ -422,6 +689,35 @@ def list_my_bookings(
     return results
 
 
+@app.get('/admin/bookings/export')
+def export_bookings(
+    export_format: str = Query(default='csv', alias='format', pattern='^(csv|ndjson)$'),
+    start_date: Optional[date] = Query(default=None),
+    end_date: Optional[date] = Query(default=None),
+    room_id: Optional[int] = Query(default=None),
+    booking_status: Optional[str] = Query(default=None, alias='status'),
+    current_user: models.User = Depends(get_current_admin),
+):
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='start_date must not be later than end_date.',
+        )
+
+    rows = _export_rows(start_date, end_date, room_id, booking_status)
+    if export_format == 'ndjson':
+        return StreamingResponse(
+            _stream_ndjson(rows),
+            media_type='application/x-ndjson',
+            headers={'Content-Disposition': 'attachment; filename="bookings.ndjson"'},
+        )
+    return StreamingResponse(
+        _stream_csv(rows),
+        media_type='text/csv',
+        headers={'Content-Disposition': 'attachment; filename="bookings.csv"'},
+    )
+
+
 @app.delete('/bookings/{booking_id}', status_code=status.HTTP_204_NO_CONTENT)
 def delete_booking(
     booking_id: int,
@@ -440,4 +736,6 @@ def delete_booking(
         )
     db.delete(booking)
     db.commit()
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    _issue_primary_pin(response)
+    return response
@@ -1,3 +1,4 @@
+import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from enum import Enum as PyEnum
@@ -20,6 +21,18 @@ def now_thai_time() -> datetime:
     return datetime.now(THAI_TZ)
 
 
+DEFAULT_USER_EMAIL = "admin@test.com"
+
+
+# Existing accounts with exactly these emails are promoted to admin on startup.
+# The auto-created default account has a public password and never is.
+ADMIN_EMAILS = {
+    email.strip()
+    for email in os.getenv("ADMIN_EMAILS", "").split(",")
+    if email.strip()
+}
+
+
 class RoomType(PyEnum):
     A = "A"
     B = "B"
@@ -86,6 +86,23 @@ class BookingResponse(BookingBase):
             return as_thai_time(value)
 
 
+class HoldCreate(BaseModel):
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class HoldResponse(HoldCreate):
+    id: int
+    expires_at: datetime
+
+    if ConfigDict:
+        model_config = ConfigDict(from_attributes=True)
+    else:  # pragma: no cover - pydantic v1 fallback
+        class Config:
+            orm_mode = True
+
+
 class UserCreate(BaseModel):
     name: str
     email: str
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+import pytest
+
+# database.py reads these at import time, so they must be set before any app
+# module is imported.
+_db_dir = tempfile.mkdtemp(prefix='library-booking-tests-')
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(_db_dir, "primary.db")}'
+os.environ['DATABASE_REPLICA_URL'] = f'sqlite:///{os.path.join(_db_dir, "replica.db")}'
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ['ADMIN_EMAILS'] = 'auditor@test.com'
+os.environ['CHAOS_PROFILE'] = 'off'
+os.environ['CHAOS_TOKEN'] = 'test-chaos-token'
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import models  # noqa: E402
+from database import ReadSessionLocal, SessionLocal  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def primary_db():
+    with SessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def replica_db():
+    with ReadSessionLocal() as db:
+        yield db
+
+
+def tomorrow_at(hour: int) -> datetime:
+    day = models.now_thai_time().date() + timedelta(days=1)
+    return datetime.combine(day, time(hour)).replace(tzinfo=models.THAI_TZ)
+
+
+def add_room(db, name: str, room_type: models.RoomType = models.RoomType.A) -> models.Room:
+    room = db.query(models.Room).filter(models.Room.name == name).first()
+    if room is None:
+        room = models.Room(name=name, type=room_type, capacity=1)
+        db.add(room)
+        db.commit()
+        db.refresh(room)
+    return room
+
+
+def register_and_login(client, email: str) -> dict:
+    client.post(
+        '/register',
+        json={'name': 'Test', 'email': email, 'password': 'password123'},
+    )
+    response = client.post(
+        '/token', data={'username': email, 'password': 'password123'}
+    )
+    return {'Authorization': f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from chaos import (
+    BUILTIN_PROFILES,
+    ChaosController,
+    ChaosProfile,
+    LatencyDistribution,
+    RouteFaults,
+    load_profiles,
+)
+
+
+def _write_profiles(tmp_path, data):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_load_profiles_merges_json_with_builtins(tmp_path):
+    path = _write_profiles(
+        tmp_path,
+        {
+            'slow-availability': {
+                'routes': {
+                    'GET /rooms/*/availability': {
+                        'latency_rate': 0.3,
+                        'latency': {'kind': 'lognormal', 'ms': 150, 'sigma': 0.8},
+                        'slow_query_rate': 0.1,
+                        'slow_query': {'kind': 'uniform', 'ms': 100, 'max_ms': 400},
+                    }
+                }
+            }
+        },
+    )
+
+    profiles = load_profiles(path)
+
+    assert {'off', 'legacy', 'slow-availability'} <= set(profiles)
+    _, faults = profiles['slow-availability'].match('GET', '/rooms/3/availability')
+    assert faults.latency.kind == 'lognormal'
+    assert faults.slow_query.max_ms == 400
+
+
+@pytest.mark.parametrize(
+    'faults',
+    [
+        {'latency_rate': 0.5, 'latency': {'kind': 'log-normal', 'ms': 100}},
+        {'error_rate': 1.5},
+        {'slow_query_rate': -0.1},
+        {'latency_rate': 0.5, 'latency': {'kind': 'uniform', 'ms': 200, 'max_ms': 100}},
+        {'unknown_field': 1},
+    ],
+)
+def test_load_profiles_rejects_invalid_definitions(tmp_path, faults):
+    path = _write_profiles(tmp_path, {'broken': {'routes': {'* *': faults}}})
+
+    with pytest.raises(ValueError, match='broken'):
+        load_profiles(path)
+
+
+def test_profile_match_uses_first_matching_glob():
+    specific = RouteFaults(error_rate=1.0)
+    fallback = RouteFaults()
+    profile = ChaosProfile(
+        name='globs',
+        routes={'POST /bookings': specific, 'DELETE /bookings/*': specific, '* *': fallback},
+    )
+
+    assert profile.match('POST', '/bookings') == ('POST /bookings', specific)
+    assert profile.match('DELETE', '/bookings/42') == ('DELETE /bookings/*', specific)
+    assert profile.match('GET', '/bookings') == ('* *', fallback)
+    assert ChaosProfile(name='empty').match('GET', '/') is None
+
+
+def _run(seed, requests):
+    faults = RouteFaults(
+        latency_rate=0.5,
+        latency=LatencyDistribution(kind='exponential', ms=100),
+        error_rate=0.3,
+        slow_query_rate=0.5,
+        slow_query=LatencyDistribution(kind='uniform', ms=10, max_ms=50),
+    )
+    # Draws are sequenced per route pattern, so each route gets its own.
+    profile = ChaosProfile(
+        name='mixed', routes={'GET /rooms': faults, 'POST /bookings': faults}
+    )
+    controller = ChaosController({'mixed': profile}, active='mixed', seed=seed)
+    outcomes = {}
+    for method, path in requests:
+        delay, error = controller.begin_request(profile, method, path)
+        slow = [controller.slow_query_delay() for _ in range(3)]
+        outcomes.setdefault(path, []).append((delay, error, slow))
+    return outcomes
+
+
+def test_seeded_runs_are_reproducible_regardless_of_interleaving():
+    requests = [('GET', '/rooms')] * 20 + [('POST', '/bookings')] * 20
+    shuffled = [request for pair in zip(requests[:20], requests[20:]) for request in pair]
+
+    first = _run(7, requests)
+    assert first == _run(7, shuffled)
+    assert first != _run(8, requests)
+
+
+def test_chaos_metrics_requires_token_and_hides_seed(client):
+    assert client.get('/chaos/metrics').status_code == 403
+    assert client.get('/chaos/metrics', headers={'x-chaos-token': 'wrong'}).status_code == 403
+
+    response = client.get('/chaos/metrics', headers={'x-chaos-token': 'test-chaos-token'})
+    assert response.status_code == 200
+    assert 'seed' not in response.json()
+
+
+def test_legacy_profile_injects_delay_or_error_never_both():
+    legacy = BUILTIN_PROFILES['legacy']
+    controller = ChaosController({'legacy': legacy}, active='legacy', seed=3)
+
+    outcomes = [controller.begin_request(legacy, 'GET', '/rooms') for _ in range(4000)]
+
+    assert not [1 for delay, error in outcomes if delay and error is not None]
+    delays = sum(1 for delay, _ in outcomes if delay == 3.0)
+    errors = sum(1 for _, error in outcomes if error == 500)
+    assert 150 <= delays <= 250
+    assert 150 <= errors <= 250
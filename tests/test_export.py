@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import main
+import models
+from conftest import add_room, register_and_login, tomorrow_at
+
+
+def _add_booking(db, room, user_id, start, status='active'):
+    db.add(
+        models.Booking(
+            room_id=room.id,
+            user_id=user_id,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            attendees_count=1,
+            status=status,
+        )
+    )
+    db.commit()
+
+
+def _seed_replica(replica_db):
+    # Exports read from the replica, so the rows only need to exist there.
+    room = add_room(replica_db, 'EXPORT-ROOM')
+    other_room = add_room(replica_db, 'EXPORT-OTHER')
+    _add_booking(replica_db, room, 1, tomorrow_at(9))
+    _add_booking(replica_db, room, 1, tomorrow_at(11), status='cancelled')
+    _add_booking(replica_db, room, 1, tomorrow_at(9) + timedelta(days=3))
+    _add_booking(replica_db, other_room, 1, tomorrow_at(9))
+    return room
+
+
+def _export_params(room):
+    day = tomorrow_at(9).date().isoformat()
+    return {'room_id': room.id, 'status': 'active', 'start_date': day, 'end_date': day}
+
+
+def test_export_streams_filtered_csv_and_ndjson(client, primary_db, replica_db):
+    room = _seed_replica(replica_db)
+    headers = register_and_login(client, 'auditor@test.com')
+    main._ensure_admin_roles(primary_db)
+    params = _export_params(room)
+
+    response = client.get('/admin/bookings/export', headers=headers, params=params)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]['room_name'] == 'EXPORT-ROOM'
+    assert rows[0]['status'] == 'active'
+    assert rows[0]['start_time'].startswith(tomorrow_at(9).isoformat()[:16])
+
+    response = client.get(
+        '/admin/bookings/export', headers=headers, params={**params, 'format': 'ndjson'}
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record['id'] for record in records] == [int(rows[0]['id'])]
+
+
+def test_export_requires_admin(client):
+    headers = register_and_login(client, 'member-exporter@test.com')
+
+    response = client.get('/admin/bookings/export', headers=headers)
+    assert response.status_code == 403
+
+
+def test_registering_listed_admin_email_stays_member(client, primary_db, monkeypatch):
+    monkeypatch.setattr(models, 'ADMIN_EMAILS', {'boss@corp.com'})
+    for email in ('boss@corp.com', 'BOSS@corp.com'):
+        response = client.post(
+            '/register',
+            json={'name': 'Test', 'email': email, 'password': 'password123'},
+        )
+        assert response.status_code == 201
+        user = primary_db.query(models.User).filter(models.User.email == email).one()
+        assert user.role == 'member'
+
+    # Promotion only applies to the exact email that is listed.
+    main._ensure_admin_roles(primary_db)
+    roles = {
+        user.email: user.role
+        for user in primary_db.query(models.User).filter(
+            models.User.email.in_(['boss@corp.com', 'BOSS@corp.com'])
+        )
+    }
+    assert roles == {'boss@corp.com': 'admin', 'BOSS@corp.com': 'member'}
+
+
+def test_default_user_is_never_promoted(client, primary_db, monkeypatch):
+    # The default account is created on startup with a publicly known password.
+    monkeypatch.setattr(models, 'ADMIN_EMAILS', {models.DEFAULT_USER_EMAIL})
+    main._ensure_admin_roles(primary_db)
+    default_user = (
+        primary_db.query(models.User)
+        .filter(models.User.email == models.DEFAULT_USER_EMAIL)
+        .one()
+    )
+    assert default_user.role == 'member'
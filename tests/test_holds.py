@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+import pytest
+
+import holds
+import models
+from conftest import add_room, register_and_login, tomorrow_at
+from holds import HoldConflictError, HoldLimitError, InMemoryHoldStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(holds.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_expired_holds_are_evicted(clock):
+    store = InMemoryHoldStore(ttl_seconds=10)
+    hold = store.place(1, 1, tomorrow_at(9), tomorrow_at(10))
+
+    clock[0] += 9
+    assert store.get(hold.id) is hold
+    assert store.conflicting(1, tomorrow_at(9), tomorrow_at(10))
+
+    clock[0] += 1
+    assert store.get(hold.id) is None
+    assert store.conflicting(1, tomorrow_at(9), tomorrow_at(10)) == []
+    # The expired hold no longer counts against the user's cap either.
+    other = InMemoryHoldStore(ttl_seconds=10, max_holds_per_user=1)
+    other.place(1, 1, tomorrow_at(9), tomorrow_at(10))
+    clock[0] += 10
+    assert other.place(2, 1, tomorrow_at(9), tomorrow_at(10)).room_id == 2
+
+
+def test_conflicting_hold_from_another_user_is_rejected(clock):
+    store = InMemoryHoldStore()
+    store.place(1, 1, tomorrow_at(9), tomorrow_at(11))
+
+    with pytest.raises(HoldConflictError):
+        store.place(1, 2, tomorrow_at(10), tomorrow_at(12))
+    assert store.place(1, 2, tomorrow_at(11), tomorrow_at(12)).user_id == 2
+
+
+def test_new_hold_replaces_users_hold_on_same_room(clock):
+    store = InMemoryHoldStore(ttl_seconds=10)
+    first = store.place(1, 1, tomorrow_at(9), tomorrow_at(10))
+    clock[0] += 8
+    second = store.place(1, 1, tomorrow_at(13), tomorrow_at(14))
+
+    assert store.get(first.id) is None
+    assert store.conflicting(1, tomorrow_at(9), tomorrow_at(10)) == []
+
+    # The replacement carries a fresh TTL, so the old deadline no longer applies.
+    clock[0] += 5
+    assert store.get(second.id) is second
+
+
+def test_holds_per_user_are_capped(clock):
+    store = InMemoryHoldStore(max_holds_per_user=2)
+    store.place(1, 1, tomorrow_at(9), tomorrow_at(10))
+    store.place(2, 1, tomorrow_at(9), tomorrow_at(10))
+
+    with pytest.raises(HoldLimitError):
+        store.place(3, 1, tomorrow_at(9), tomorrow_at(10))
+    # Replacing an existing hold does not count against the cap.
+    store.place(2, 1, tomorrow_at(11), tomorrow_at(12))
+
+
+def test_release_for_user_only_drops_that_users_holds(clock):
+    store = InMemoryHoldStore()
+    mine = store.place(1, 1, tomorrow_at(9), tomorrow_at(10))
+    theirs = store.place(1, 2, tomorrow_at(11), tomorrow_at(12))
+
+    store.release_for_user(1, 1)
+
+    assert store.get(mine.id) is None
+    assert store.get(theirs.id) is theirs
+
+
+def _hold(client, headers, room_id, start, end):
+    return client.post(
+        '/holds',
+        headers=headers,
+        json={
+            'room_id': room_id,
+            'start_time': start.isoformat(),
+            'end_time': end.isoformat(),
+        },
+    )
+
+
+def test_hold_blocks_other_users_until_booking_releases_it(client, primary_db):
+    room = add_room(primary_db, 'HOLD-ROOM')
+    holder = register_and_login(client, 'holder@test.com')
+    other = register_and_login(client, 'other-holder@test.com')
+
+    assert _hold(client, holder, room.id, tomorrow_at(14), tomorrow_at(15)).status_code == 201
+    assert _hold(client, other, room.id, tomorrow_at(14), tomorrow_at(15)).status_code == 409
+
+    booking = client.post(
+        '/bookings',
+        headers=holder,
+        json={
+            'room_id': room.id,
+            'start_time': tomorrow_at(14).isoformat(),
+            'end_time': tomorrow_at(15).isoformat(),
+            'attendees_count': 1,
+        },
+    )
+    assert booking.status_code == 201
+    assert holds.hold_store.conflicting(room.id, tomorrow_at(14), tomorrow_at(15)) == []
+
+
+def test_hold_outside_opening_hours_or_in_past_is_rejected(client, primary_db):
+    room = add_room(primary_db, 'HOLD-HOURS')
+    headers = register_and_login(client, 'hours@test.com')
+
+    assert _hold(client, headers, room.id, tomorrow_at(19), tomorrow_at(21)).status_code == 400
+    yesterday = timedelta(days=2)
+    assert (
+        _hold(client, headers, room.id, tomorrow_at(9) - yesterday, tomorrow_at(10) - yesterday)
+        .status_code
+        == 400
+    )
+
+
+def test_hold_and_booking_share_overlap_rules(client, primary_db):
+    room = add_room(primary_db, 'HOLD-COMPLETED')
+    primary_db.add(
+        models.Booking(
+            room_id=room.id,
+            user_id=1,
+            start_time=tomorrow_at(16),
+            end_time=tomorrow_at(17),
+            attendees_count=1,
+            status='completed',
+        )
+    )
+    primary_db.commit()
+    headers = register_and_login(client, 'completed@test.com')
+
+    assert _hold(client, headers, room.id, tomorrow_at(16), tomorrow_at(17)).status_code == 409
+    booking = client.post(
+        '/bookings',
+        headers=headers,
+        json={
+            'room_id': room.id,
+            'start_time': tomorrow_at(16).isoformat(),
+            'end_time': tomorrow_at(17).isoformat(),
+            'attendees_count': 1,
+        },
+    )
+    assert booking.status_code == 409
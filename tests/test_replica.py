@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+import main
+from conftest import add_room, register_and_login, tomorrow_at
+
+
+def _room_names(client, headers):
+    response = client.get('/rooms', headers=headers)
+    assert response.status_code == 200
+    return {room['name'] for room in response.json()}
+
+
+def test_unpinned_reads_hit_replica(client, primary_db, replica_db):
+    add_room(primary_db, 'PRIMARY-ONLY')
+    add_room(replica_db, 'REPLICA-ONLY')
+
+    names = _room_names(client, {})
+    assert 'REPLICA-ONLY' in names
+    assert 'PRIMARY-ONLY' not in names
+
+
+def test_write_pins_client_to_primary(client, primary_db, replica_db):
+    room = add_room(primary_db, 'PIN-ROOM')
+    add_room(replica_db, 'REPLICA-ONLY')
+    headers = register_and_login(client, 'pinned@test.com')
+
+    response = client.post(
+        '/bookings',
+        headers=headers,
+        json={
+            'room_id': room.id,
+            'start_time': tomorrow_at(9).isoformat(),
+            'end_time': tomorrow_at(10).isoformat(),
+            'attendees_count': 1,
+        },
+    )
+    assert response.status_code == 201
+    pin = response.headers['x-primary-pin']
+
+    names = _room_names(client, {'x-primary-pin': pin})
+    assert 'PIN-ROOM' in names
+    assert 'REPLICA-ONLY' not in names
+
+    bookings = client.get('/my-bookings', headers={**headers, 'x-primary-pin': pin})
+    assert [booking['room_name'] for booking in bookings.json()] == ['PIN-ROOM']
+
+
+def test_expired_or_forged_pin_reads_replica(client, replica_db):
+    add_room(replica_db, 'REPLICA-ONLY')
+    expired = jwt.encode(
+        {'pin': True, 'exp': datetime.utcnow() - timedelta(seconds=1)},
+        main.SECRET_KEY,
+        algorithm=main.ALGORITHM,
+    )
+    forged = jwt.encode({'pin': True}, 'wrong-key', algorithm=main.ALGORITHM)
+
+    for pin in (expired, forged):
+        assert 'REPLICA-ONLY' in _room_names(client, {'x-primary-pin': pin})
+
+
+def test_primary_pin_is_not_a_bearer_token(client):
+    response = client.post(
+        '/register',
+        json={'name': 'Test', 'email': 'pin-bearer@test.com', 'password': 'password123'},
+    )
+    pin = response.headers['x-primary-pin']
+
+    response = client.delete('/holds/999', headers={'Authorization': f'Bearer {pin}'})
+    assert response.status_code == 401